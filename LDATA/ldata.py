@@ -1,13 +1,44 @@
+import argparse
+import asyncio
+import os
+import sys
 import requests
-from dataclasses import dataclass
-from typing import List, Optional, Dict, Any, Set
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dataclasses import dataclass, fields
+from typing import List, Optional, Dict, Any, Set, Tuple
+import orjson
+import time
 import socket
 import ipaddress
 from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from urllib.parse import urlparse
 
-@dataclass
+def _make_session() -> requests.Session:
+    """Create a Session whose connection pool is sized for concurrent use"""
+    session = requests.Session()
+    # The default pool keeps only 10 connections per host; extra concurrent
+    # requests would open and discard connections instead of reusing them.
+    # Only connection setup is retried: some GETs (e.g. trip) change device
+    # state and must not be resent after the request went out.
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=32,
+        max_retries=Retry(total=2, connect=2, read=False, status=0, other=0, backoff_factor=0.2),
+    )
+    session.mount("http://", adapter)
+    return session
+
+# Shared session for discovery, reused across scans. Each host gets a single
+# request, so there is no pooling to tune and no retries: a host that fails
+# to answer during a scan is simply not a device.
+_discovery_session = requests.Session()
+
+# dataclass(slots=...) needs Python 3.10+; older versions get regular instances
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(frozen=True, **_SLOTS)
 class BreakerInfo:
     id: str  # MAC address
     average_current: float
@@ -25,7 +56,7 @@ class BreakerInfo:
     rms_voltage: float
     serial_number: str
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class PanelInfo:
     id: str
     breaker_count: int
@@ -39,11 +70,55 @@ class PanelInfo:
     version_bsm: str
     version_ncm: str
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class WifiNetwork:
     ssid: str
     signal_strength: Optional[float] = None
 
+def _make_from_dict(cls, mapping: Dict[str, str]):
+    """Compile a from_dict(d) for cls that reads each field from its API key"""
+    args = ", ".join(f"d[{mapping[f.name]!r}]" for f in fields(cls))
+    namespace = {"cls": cls}
+    exec(f"def from_dict(d):\n    return cls({args})\n", namespace)
+    return staticmethod(namespace["from_dict"])
+
+BreakerInfo.from_dict = _make_from_dict(BreakerInfo, {
+    "id": "id",
+    "average_current": "averageCurrent",
+    "branch_type": "branchType",
+    "current_rating": "currentRating",
+    "current_state": "currentState",
+    "energy_consumption": "energyConsumption",
+    "line_frequency": "lineFrequency",
+    "manufacturer": "manufacturer",
+    "model": "model",
+    "name": "name",
+    "position": "position",
+    "power": "power",
+    "rms_current": "rmsCurrent",
+    "rms_voltage": "rmsVoltage",
+    "serial_number": "serialNumber",
+})
+
+PanelInfo.from_dict = _make_from_dict(PanelInfo, {
+    "id": "id",
+    "breaker_count": "breakerCount",
+    "commissioned": "commissioned",
+    "manufacturer": "manufacturer",
+    "model": "model",
+    "name": "name",
+    "package_ver": "packageVer",
+    "panel_size": "panelSize",
+    "version_bcm": "versionBCM",
+    "version_bsm": "versionBSM",
+    "version_ncm": "versionNCM",
+})
+
+WifiNetwork.from_dict = _make_from_dict(WifiNetwork, {
+    "ssid": "ssid",
+    "signal_strength": "signalStrength",
+})
+
 class LDATADeviceInfo:
     """Information about a discovered LDATA device"""
     def __init__(self, ip: str, panel_id: str, port: int = 13107):
@@ -56,9 +131,15 @@ class LDATADeviceInfo:
 
 class LDATAClient:
     """Client for interacting with LDATA device API"""
+
+    # Seconds to keep responses in memory before asking the device again
+    PANEL_TTL = 3600.0  # panel metadata is effectively immutable
+    BREAKER_TTL = 5.0   # currents and power change constantly
+    WIFI_TTL = 30.0
     
     @staticmethod
-    def discover_devices(network: str = "192.168.1.0/24", port: int = 13107, timeout: float = 0.5) -> List[LDATADeviceInfo]:
+    def discover_devices(network: str = "192.168.1.0/24", port: int = 13107, timeout: float = 0.5,
+                         max_concurrency: int = 256) -> List[LDATADeviceInfo]:
         """
         Discover LDATA devices on the network
         
@@ -66,70 +147,173 @@ class LDATAClient:
             network: Network CIDR to scan (e.g., "192.168.1.0/24")
             port: Port to scan for LDATA API (default: 13107)
             timeout: Timeout for each connection attempt in seconds
+            max_concurrency: Maximum number of hosts probed at once
             
         Returns:
             List of discovered LDATA devices
+            
+        Raises:
+            ValueError: If max_concurrency is less than 1
         """
-        def check_host(ip: str) -> Optional[LDATADeviceInfo]:
-            try:
-                # Try to connect to the API endpoint
-                url = f"http://{ip}:{port}/api"
-                response = requests.get(url, timeout=timeout)
-                
-                # If we get a response, try to get the panel ID
-                if response.status_code == 200:
-                    # The panel ID will be in any panel-specific response
-                    # Try the wifi SSIDs endpoint as it's lightweight
-                    panels_url = f"{url}/residentialBreakerPanels"
-                    panels_response = requests.get(panels_url, timeout=timeout)
-                    
-                    if panels_response.status_code == 200:
-                        panels_data = panels_response.json()
-                        # The response format might vary, but we expect the panel ID
-                        # to be available in some form
-                        if isinstance(panels_data, list) and len(panels_data) > 0:
-                            panel_id = panels_data[0].get('id')
-                            if panel_id and panel_id.startswith('LDATA-'):
-                                return LDATADeviceInfo(ip, panel_id, port)
-                        
-            except (requests.RequestException, json.JSONDecodeError, KeyError):
-                pass
-            return None
-
-        # Generate list of IP addresses to scan
-        network = ipaddress.ip_network(network)
-        ips = [str(ip) for ip in network.hosts()]
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+
+        def scan() -> List[LDATADeviceInfo]:
+            return asyncio.run(LDATAClient.discover_devices_async(network, port, timeout, max_concurrency))
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return scan()
+
+        # Called from async code (e.g. Jupyter): asyncio.run() can't nest, so
+        # give the scan its own event loop in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(scan).result()
+
+    @staticmethod
+    async def discover_devices_async(network: str = "192.168.1.0/24", port: int = 13107, timeout: float = 0.5,
+                                     max_concurrency: int = 256) -> List[LDATADeviceInfo]:
+        """
+        Discover LDATA devices on the network from async code
+        
+        Probes every host concurrently from the calling event loop. Takes the
+        same arguments and returns the same result as discover_devices.
         
-        # Scan network with thread pool
+        Raises:
+            ValueError: If max_concurrency is less than 1
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+
+        loop = asyncio.get_running_loop()
+        net = ipaddress.ip_network(network)
+        # Shared lazy iterator: workers pull addresses as they go, so memory
+        # stays bounded by max_concurrency rather than the size of the network
+        hosts = (str(ip) for ip in net.hosts())
         discovered_devices = []
-        with ThreadPoolExecutor(max_workers=50) as executor:
-            for device in executor.map(check_host, ips):
+
+        async def worker() -> None:
+            for ip in hosts:
+                # Cheap TCP probe first so dead hosts never reach the HTTP stack
+                try:
+                    _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+                except (OSError, asyncio.TimeoutError):
+                    continue
+                writer.close()
+                # Release the probe socket before the HTTP check connects again
+                try:
+                    await writer.wait_closed()
+                except OSError:
+                    pass
+
+                device = await loop.run_in_executor(None, LDATAClient.check_host, ip, port, timeout)
                 if device:
                     discovered_devices.append(device)
+
+        await asyncio.gather(*(worker() for _ in range(max_concurrency)))
+        # Workers finish in arbitrary order; report devices in address order
+        return sorted(discovered_devices, key=lambda device: ipaddress.ip_address(device.ip))
+
+    @staticmethod
+    def check_host(ip: str, port: int = 13107, timeout: float = 0.5) -> Optional[LDATADeviceInfo]:
+        """
+        Check whether a single host is an LDATA device
+        
+        Args:
+            ip: IP address of the host
+            port: Port of the LDATA API (default: 13107)
+            timeout: Timeout for each request in seconds
+            
+        Returns:
+            LDATADeviceInfo if the host answers as an LDATA device, None otherwise
+        """
+        try:
+            # Go straight to the panels endpoint; a non-200 there is just as
+            # conclusive as probing /api first and saves a round-trip
+            panels_url = f"http://{ip}:{port}/api/residentialBreakerPanels"
+            panels_response = _discovery_session.get(panels_url, timeout=timeout)
+            
+            if panels_response.status_code == 200:
+                panels_data = orjson.loads(panels_response.content)
+                # The response format might vary, but we expect the panel ID
+                # to be available in some form
+                if isinstance(panels_data, list) and len(panels_data) > 0:
+                    panel_id = panels_data[0].get('id')
+                    if panel_id and panel_id.startswith('LDATA-'):
+                        return LDATADeviceInfo(ip, panel_id, port)
                     
-        return discovered_devices
+        except (requests.RequestException, orjson.JSONDecodeError, KeyError):
+            pass
+        return None
     
-    def __init__(self, host: str, port: int = 13107):
+    def __init__(self, host: str, port: int = 13107, timeout: float = 10.0):
         """
         Initialize LDATA client
         
         Args:
             host: IP address or hostname of LDATA device
             port: API port number (default 13107)
+            timeout: Timeout for each API request in seconds
         """
         self.base_url = f"http://{host}:{port}/api"
+        self.timeout = timeout
+        # Reuse one connection across calls (HTTP keep-alive)
+        self._session = _make_session()
+        self._session.headers.update({"Accept": "application/json"})
+        # endpoint -> (time fetched, parsed result)
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+
+    def close(self) -> None:
+        """Close the underlying HTTP session"""
+        self._session.close()
+
+    def __enter__(self) -> "LDATAClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+        
+    def invalidate_cache(self) -> None:
+        """Drop all cached responses so the next calls hit the device"""
+        self._cache.clear()
+
+    def _cache_lookup(self, endpoint: str, ttl: float) -> Optional[Any]:
+        """Return the cached result for an endpoint if younger than ttl seconds"""
+        entry = self._cache.get(endpoint)
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            return self._cache_copy(entry[1])
+        return None
+
+    def _cache_store(self, endpoint: str, result: Any) -> Any:
+        """Cache a parsed result for an endpoint and return it"""
+        self._cache[endpoint] = (time.monotonic(), result)
+        return self._cache_copy(result)
+
+    @staticmethod
+    def _cache_copy(result: Any) -> Any:
+        """Copy cached lists so callers can't reorder or edit the cache; records are frozen"""
+        return list(result) if isinstance(result, list) else result
         
+    @staticmethod
+    def _decode(response: requests.Response) -> Any:
+        """Parse a JSON response body, raising the same error as Response.json()"""
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError as e:
+            raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from e
+
     def _get(self, endpoint: str) -> Dict[str, Any]:
         """Make GET request to API endpoint"""
-        response = requests.get(f"{self.base_url}/{endpoint}")
+        response = self._session.get(f"{self.base_url}/{endpoint}", timeout=self.timeout)
         response.raise_for_status()
-        return response.json()
+        return self._decode(response)
         
     def _post(self, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
         """Make POST request to API endpoint"""
-        response = requests.post(f"{self.base_url}/{endpoint}", data=data)
+        response = self._session.post(f"{self.base_url}/{endpoint}", data=data, timeout=self.timeout)
         response.raise_for_status()
-        return response.json()
+        return self._decode(response)
 
     def get_panel_info(self, panel_id: str) -> PanelInfo:
         """
@@ -141,20 +325,13 @@ class LDATAClient:
         Returns:
             PanelInfo object containing panel details
         """
-        data = self._get(f"residentialBreakerPanels/{panel_id}")
-        return PanelInfo(
-            id=data["id"],
-            breaker_count=data["breakerCount"],
-            commissioned=data["commissioned"],
-            manufacturer=data["manufacturer"],
-            model=data["model"],
-            name=data["name"],
-            package_ver=data["packageVer"],
-            panel_size=data["panelSize"],
-            version_bcm=data["versionBCM"],
-            version_bsm=data["versionBSM"],
-            version_ncm=data["versionNCM"]
-        )
+        endpoint = f"residentialBreakerPanels/{panel_id}"
+        cached = self._cache_lookup(endpoint, self.PANEL_TTL)
+        if cached is not None:
+            return cached
+
+        data = self._get(endpoint)
+        return self._cache_store(endpoint, PanelInfo.from_dict(data))
 
     def get_breakers(self, panel_id: str) -> List[BreakerInfo]:
         """
@@ -166,27 +343,13 @@ class LDATAClient:
         Returns:
             List of BreakerInfo objects containing breaker details
         """
-        data = self._get(f"residentialBreakerPanels/{panel_id}/residentialBreakers")
-        return [
-            BreakerInfo(
-                id=breaker["id"],
-                average_current=breaker["averageCurrent"],
-                branch_type=breaker["branchType"],
-                current_rating=breaker["currentRating"],
-                current_state=breaker["currentState"],
-                energy_consumption=breaker["energyConsumption"],
-                line_frequency=breaker["lineFrequency"],
-                manufacturer=breaker["manufacturer"],
-                model=breaker["model"],
-                name=breaker["name"],
-                position=breaker["position"],
-                power=breaker["power"],
-                rms_current=breaker["rmsCurrent"],
-                rms_voltage=breaker["rmsVoltage"],
-                serial_number=breaker["serialNumber"]
-            )
-            for breaker in data
-        ]
+        endpoint = f"residentialBreakerPanels/{panel_id}/residentialBreakers"
+        cached = self._cache_lookup(endpoint, self.BREAKER_TTL)
+        if cached is not None:
+            return cached
+
+        data = self._get(endpoint)
+        return self._cache_store(endpoint, [BreakerInfo.from_dict(breaker) for breaker in data])
 
     def trip_breaker(self, breaker_id: str) -> bool:
         """
@@ -199,6 +362,7 @@ class LDATAClient:
             True if successful, False otherwise
         """
         response = self._get(f"residentialBreakers/{breaker_id}/trip")
+        self.invalidate_cache()
         return response["messageType"] == "ACK"
 
     def get_wifi_networks(self, panel_id: str, include_signal_strength: bool = False) -> List[WifiNetwork]:
@@ -213,19 +377,18 @@ class LDATAClient:
             List of WifiNetwork objects
         """
         endpoint = f"residentialBreakerPanels/{panel_id}/{'wifiSSIDsWithRSSI' if include_signal_strength else 'wifiSSIDs'}"
+        cached = self._cache_lookup(endpoint, self.WIFI_TTL)
+        if cached is not None:
+            return cached
+
         data = self._get(endpoint)
         
-        networks = []
         if include_signal_strength:
-            for network in data["ssids"]:
-                networks.append(WifiNetwork(
-                    ssid=network["ssid"],
-                    signal_strength=network["signalStrength"]
-                ))
+            networks = [WifiNetwork.from_dict(network) for network in data["ssids"]]
         else:
             networks = [WifiNetwork(ssid=ssid) for ssid in data["ssids"]]
             
-        return networks
+        return self._cache_store(endpoint, networks)
 
     def connect_wifi(self, panel_id: str, ssid: str, passphrase: str) -> bool:
         """
@@ -244,6 +407,7 @@ class LDATAClient:
             "passphrase": passphrase
         }
         response = self._post(f"residentialBreakerPanels/{panel_id}/wifiConnect", data)
+        self.invalidate_cache()
         return response["messageType"] == "ACK"
 
     def disconnect_wifi(self, panel_id: str) -> bool:
@@ -257,13 +421,95 @@ class LDATAClient:
             True if successful, False otherwise
         """
         response = self._post(f"residentialBreakerPanels/{panel_id}/wifiDisable")
+        self.invalidate_cache()
         return response["messageType"] == "ACK"
 
+def _default_cache_path() -> Path:
+    """
+    Where discovered devices are remembered between runs
+    
+    Resolved on each call rather than at import so a missing home directory
+    only affects the cache, not every user of this module.
+    
+    Raises:
+        RuntimeError: If neither XDG_CACHE_HOME nor a home directory is available
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    # The XDG spec says relative paths are invalid and must be ignored
+    if cache_home and Path(cache_home).is_absolute():
+        base = Path(cache_home)
+    else:
+        base = Path.home() / ".cache"
+    return base / "ldata" / "devices.json"
+
+def load_cached_devices(path: Optional[Path] = None) -> List[LDATADeviceInfo]:
+    """
+    Load previously discovered devices from disk
+    
+    Args:
+        path: Cache file location (default: $XDG_CACHE_HOME/ldata/devices.json,
+            or ~/.cache/ldata/devices.json)
+        
+    Returns:
+        List of cached LDATA devices, empty if there is no usable cache
+    """
+    try:
+        if path is None:
+            path = _default_cache_path()
+        entries = orjson.loads(path.read_bytes())
+        return [LDATADeviceInfo(entry["ip"], entry["panel_id"], entry["port"]) for entry in entries]
+    except (OSError, RuntimeError, orjson.JSONDecodeError, KeyError, TypeError):
+        return []
+
+def save_cached_devices(devices: List[LDATADeviceInfo], path: Optional[Path] = None) -> None:
+    """
+    Save discovered devices to disk so later runs can skip the network scan
+    
+    Does nothing when no path is given and no cache directory can be located.
+    
+    Args:
+        devices: Devices to remember
+        path: Cache file location (default: see load_cached_devices)
+        
+    Raises:
+        OSError: If the cache file can't be written
+    """
+    if path is None:
+        try:
+            path = _default_cache_path()
+        except RuntimeError:
+            return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(orjson.dumps([
+        {"ip": device.ip, "panel_id": device.panel_id, "port": device.port}
+        for device in devices
+    ]))
+
 # Example usage:
 if __name__ == "__main__":
-    # Discover LDATA devices on the network
-    print("Discovering LDATA devices...")
-    devices = LDATAClient.discover_devices()
+    parser = argparse.ArgumentParser(description="Example LDATA client usage")
+    parser.add_argument("--rescan", action="store_true",
+                        help="ignore cached devices and scan the network")
+    args = parser.parse_args()
+
+    # Try the last known devices first; DHCP leases rarely change
+    devices = []
+    if not args.rescan:
+        for cached in load_cached_devices():
+            device = LDATAClient.check_host(cached.ip, cached.port)
+            if device:
+                devices.append(device)
+
+    if not devices:
+        # Discover LDATA devices on the network
+        print("Discovering LDATA devices...")
+        devices = LDATAClient.discover_devices()
+        if devices:
+            # The cache is only an optimisation; an unwritable home shouldn't stop the example
+            try:
+                save_cached_devices(devices)
+            except OSError as e:
+                print(f"Could not cache discovered devices: {e}")
     
     if not devices:
         print("No LDATA devices found on the network")
@@ -274,19 +520,25 @@ if __name__ == "__main__":
     print(f"Found device: {device}")
     
     # Initialize client with discovered device
-    client = LDATAClient(device.ip, device.port)
-    PANEL_ID = device.panel_id
+    with LDATAClient(device.ip, device.port) as client:
+        PANEL_ID = device.panel_id
+    
+        # The endpoints are independent, so fetch them concurrently over the shared session
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            panel_future = executor.submit(client.get_panel_info, PANEL_ID)
+            breakers_future = executor.submit(client.get_breakers, PANEL_ID)
+            networks_future = executor.submit(client.get_wifi_networks, PANEL_ID, True)
+            panel = panel_future.result()
+            breakers = breakers_future.result()
+            networks = networks_future.result()
     
-    # Get panel info
-    panel = client.get_panel_info(PANEL_ID)
-    print(f"Panel {panel.name}: {panel.breaker_count} breakers")
+        # Panel info
+        print(f"Panel {panel.name}: {panel.breaker_count} breakers")
     
-    # Get breaker info
-    breakers = client.get_breakers(PANEL_ID)
-    for breaker in breakers:
-        print(f"Breaker {breaker.name}: {breaker.power}W")
+        # Breaker info
+        for breaker in breakers:
+            print(f"Breaker {breaker.name}: {breaker.power}W")
     
-    # Get WiFi networks with signal strength
-    networks = client.get_wifi_networks(PANEL_ID, include_signal_strength=True)
-    for network in networks:
-        print(f"Network {network.ssid}: {network.signal_strength}dBm")
+        # WiFi networks with signal strength
+        for network in networks:
+            print(f"Network {network.ssid}: {network.signal_strength}dBm")
@@ -4,16 +4,18 @@ LDATA Serial Modification Tool
 This script safely applies modifications to enable local API access on Leviton LDATA devices.
 """
 
+import re
 import sys
 import time
 import logging
 import serial
 import serial.tools.list_ports
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Optional, List, Dict
-import json
+from orjson import dumps, OPT_INDENT_2
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
 from rich.progress import Progress, SpinnerColumn, TextColumn
@@ -32,6 +34,11 @@ logging.basicConfig(
 
 console = Console()
 
+UBOOT_PROMPT = b"MX6UL_VAR_DART(mmc)==>"
+
+# "mmc part" table rows: partition number, start sector, sector count
+PARTITION_RE = re.compile(rb"^[ \t]*(\d+)[ \t]+\S+[ \t]+(\d+)", re.MULTILINE)
+
 @dataclass
 class LDATADevice:
     serial_port: str
@@ -77,44 +84,53 @@ class LDATAModifier:
         
         # Save current configuration
         if self.device.device_id:
-            with open(backup_path / "device_info.json", 'w') as f:
-                json.dump({
-                    'device_id': self.device.device_id,
-                    'mac_addresses': self.device.mac_addresses,
-                    'data_partition': self.device.data_partition
-                }, f, indent=2)
+            (backup_path / "device_info.json").write_bytes(dumps({
+                'device_id': self.device.device_id,
+                'mac_addresses': self.device.mac_addresses,
+                'data_partition': self.device.data_partition
+            }, option=OPT_INDENT_2))
         
         logging.info(f"Created backup at {backup_path}")
 
     def wait_for_bootloader(self, timeout: int = 30) -> bool:
         """Wait for U-Boot bootloader prompt."""
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            transient=True,
-        ) as progress:
-            task = progress.add_task("Waiting for bootloader...", total=timeout)
-            
-            start_time = time.time()
-            buffer = ""
-            
-            while (time.time() - start_time) < timeout:
-                if self.serial.in_waiting:
-                    char = self.serial.read().decode('utf-8', errors='ignore')
-                    buffer += char
-                    if "MX6UL_VAR_DART(mmc)==>" in buffer:
-                        return True
-                progress.update(task, advance=1)
+        previous_timeout = self.serial.timeout
+        self.serial.timeout = timeout
+        try:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                transient=True,
+            ) as progress, ThreadPoolExecutor(max_workers=1) as executor:
+                task = progress.add_task("Waiting for bootloader...", total=timeout)
                 
-            return False
+                # Block in pyserial until the prompt arrives or the port times out
+                future = executor.submit(self.serial.read_until, UBOOT_PROMPT, 65536)
+                while not future.done():
+                    progress.update(task, advance=0.1)
+                    time.sleep(0.1)
+                    
+                return UBOOT_PROMPT in future.result()
+        finally:
+            self.serial.timeout = previous_timeout
+
+    def _cmd(self, line: bytes, prompt: bytes = UBOOT_PROMPT, timeout: float = 5) -> bytes:
+        """Send a U-Boot command and return its output once the prompt reappears."""
+        previous_timeout = self.serial.timeout
+        self.serial.timeout = timeout
+        try:
+            # Drop stale output so an old prompt can't end the read early
+            self.serial.reset_input_buffer()
+            self.serial.write(line)
+            # Skip the echo so checks can't match text from the command itself
+            return self.serial.read_until(prompt).partition(b"\n")[2]
+        finally:
+            self.serial.timeout = previous_timeout
 
     def identify_data_partition(self) -> Optional[int]:
         """Identify the data partition through analysis of partition table."""
-        self.serial.write(b"printenv\n")
-        time.sleep(1)
-        
         # Parse output for mmcdev
-        output = self.serial.read_all().decode('utf-8', errors='ignore')
+        output = self._cmd(b"printenv\n").decode('utf-8', errors='ignore')
         
         try:
             # Extract mmcdev number
@@ -125,26 +141,12 @@ class LDATAModifier:
             else:
                 raise ValueError("Could not find mmcdev in output")
 
-            # Get partition table
-            self.serial.write(f"mmc dev {mmcdev}\n".encode())
-            time.sleep(0.5)
-            self.serial.write(b"mmc part\n")
-            time.sleep(1)
-            
-            part_output = self.serial.read_all().decode('utf-8', errors='ignore')
+            # Select the device and get its partition table in one round-trip
+            part_output = self._cmd(f"mmc dev {mmcdev}; mmc part\n".encode())
             
             # Find data partition (usually the largest partition)
-            max_size = 0
-            data_part = None
-            
-            for line in part_output.split('\n'):
-                if line.strip() and line[0].isdigit():
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        size = int(parts[2])
-                        if size > max_size:
-                            max_size = size
-                            data_part = int(parts[0])
+            sizes = [(int(part), int(size)) for part, size in PARTITION_RE.findall(part_output)]
+            data_part = max(sizes, key=lambda entry: entry[1])[0] if sizes else None
             
             return data_part
             
@@ -155,41 +157,21 @@ class LDATAModifier:
     def enable_api_access(self) -> bool:
         """Enable API access by creating necessary configuration file."""
         try:
-            # Zero out memory
-            self.serial.write(b"mw.b 0x82000000 0 6300000\n")
-            time.sleep(1)
-            
-            # Write "true" to memory
-            commands = [
-                b"mw.b 0x82000000 0x74\n",  # t
-                b"mw.b 0x82000001 0x72\n",  # r
-                b"mw.b 0x82000002 0x75\n",  # u
-                b"mw.b 0x82000003 0x65\n",  # e
-                b"mw.b 0x82000004 0x0a\n"   # newline
-            ]
-            
-            for cmd in commands:
-                self.serial.write(cmd)
-                time.sleep(0.2)
-            
-            # Verify memory contents
-            self.serial.write(b"md.b 0x82000000 0x5\n")
-            time.sleep(1)
-            output = self.serial.read_all().decode('utf-8', errors='ignore')
+            # Write "true\n" to memory ("true" as one little-endian word, then the
+            # newline) and dump it back for verification in one round-trip
+            word = int.from_bytes(b"true", "little")
+            cmd = f"mw.l 0x82000000 0x{word:08x}; mw.b 0x82000004 0x0a; md.b 0x82000000 0x5\n"
+            output = self._cmd(cmd.encode()).decode('utf-8', errors='ignore')
             
             if not all(x in output for x in ['74', '72', '75', '65']):
                 raise ValueError("Memory verification failed")
             
             # Write to filesystem
             if self.device.data_partition:
-                cmd = f"ext4write mmc 1:{self.device.data_partition} 0x82000000 /HTTP_API_ALWAYS_ON 5\n"
-                self.serial.write(cmd.encode())
-                time.sleep(1)
-                
-                # Verify file creation
-                self.serial.write(f"ext4ls mmc 1:{self.device.data_partition}\n".encode())
-                time.sleep(1)
-                output = self.serial.read_all().decode('utf-8', errors='ignore')
+                # Write the file and list the partition to verify it in one round-trip
+                part = self.device.data_partition
+                cmd = f"ext4write mmc 1:{part} 0x82000000 /HTTP_API_ALWAYS_ON 5; ext4ls mmc 1:{part}\n"
+                output = self._cmd(cmd.encode()).decode('utf-8', errors='ignore')
                 
                 if 'HTTP_API_ALWAYS_ON' in output:
                     self.device.api_enabled = True
@@ -207,19 +189,24 @@ class LDATAModifier:
             if not self.device.api_enabled:
                 return False
                 
-            # Reset device
+            # Reset device; the startup message check below waits for the reboot
             self.serial.write(b"reset\n")
-            time.sleep(5)  # Wait for reboot
             
             # Look for API startup message
+            marker = b"HTTP API server started on port"
+            buffer = bytearray()
             timeout = 60
             start_time = time.time()
             while (time.time() - start_time) < timeout:
-                if self.serial.in_waiting:
-                    output = self.serial.read_all().decode('utf-8', errors='ignore')
-                    if "HTTP API server started on port" in output:
+                waiting = self.serial.in_waiting
+                if waiting:
+                    buffer += self.serial.read(waiting)
+                    if marker in buffer:
                         return True
-                time.sleep(1)
+                    # Keep just enough tail to catch a marker split across reads
+                    del buffer[:-len(marker)]
+                else:
+                    time.sleep(0.1)
                 
             return False
             